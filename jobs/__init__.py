@@ -0,0 +1,645 @@
+"""Data quality jobs collection."""
+
+import functools
+import re
+
+from celery import group, shared_task
+from celery.exceptions import TimeoutError as CeleryTimeoutError
+from celery.result import allow_join_result
+from django.db import DataError, connection, transaction
+from django.db.models import BooleanField, Case, F, Prefetch, When
+
+from nautobot.apps.jobs import BooleanVar, Job, MultiObjectVar, StringVar, register_jobs
+from nautobot.circuits.models import Circuit
+from nautobot.dcim.models import Device, DeviceType, Location
+from nautobot.extras.choices import LogLevelChoices
+from nautobot.extras.constants import (
+    JOB_LOG_MAX_ABSOLUTE_URL_LENGTH,
+    JOB_LOG_MAX_LOG_OBJECT_LENGTH,
+)
+from nautobot.extras.models import JobLogEntry, Role
+from nautobot.ipam.models import IPAddress
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+
+name = "Data Quality Jobs Collection"
+
+# Below this many devices the queueing and serialization overhead of fanning
+# work out to the worker pool outweighs the per-device regex cost.
+PARALLEL_THRESHOLD = 1000
+HOSTNAME_CHUNK_SIZE = 500
+# How long the parent job waits for its chunk tasks before giving up and
+# matching in-process; on a deployment without spare workers the chunks
+# never get scheduled at all.
+CHUNK_JOIN_TIMEOUT = 300
+
+
+def filter_devices(location=None, device_role=None, device_type=None, select=()):
+    """Return a queryset of devices matching the form selections.
+
+    ``select`` names the FK fields the caller will read while iterating, so
+    they are joined up front instead of fetched lazily per device.
+    """
+    # A bare select_related() would follow every non-null FK; only join what
+    # the caller asked for.
+    devices = Device.objects.select_related(*select) if select else Device.objects.all()
+
+    # None of the jobs read the big JSON/text columns; rendering a device in
+    # the job log only touches the name. Callers that narrow further with
+    # .only(...) simply override this.
+    devices = devices.defer(
+        "_custom_field_data",
+        "local_config_context_data",
+        "local_config_context_schema",
+        "comments",
+    )
+
+    if location:
+        devices = devices.filter(location__in=location)
+
+    if device_role:
+        devices = devices.filter(role__in=device_role)
+
+    if device_type:
+        devices = devices.filter(device_type__in=device_type)
+
+    return devices
+
+
+def flush_results(job, results):
+    """Persist accumulated per-object results as a single bulk insert.
+
+    Every logger call writes its own JobLogEntry row, so jobs that iterate
+    thousands of devices spend most of their time on row inserts. Collecting
+    ``(level, obj, message)`` tuples and bulk-creating them at the end turns
+    N inserts into a handful.
+    """
+    # Truncate like JobResult.log does: log_object and absolute_url are
+    # bounded columns, and one over-long device name would fail the whole
+    # bulk insert — after every per-device entry was deferred to it.
+    entries = [
+        JobLogEntry(
+            job_result=job.job_result,
+            log_level=level,
+            grouping="run",
+            log_object=str(obj)[:JOB_LOG_MAX_LOG_OBJECT_LENGTH],
+            absolute_url=obj.get_absolute_url()[:JOB_LOG_MAX_ABSOLUTE_URL_LENGTH],
+            message=message,
+        )
+        for level, obj, message in results
+    ]
+    JobLogEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+def _is_escaped(raw, index):
+    """Return True if the character at ``index`` is backslash-escaped."""
+    backslashes = 0
+    while index - backslashes - 1 >= 0 and raw[index - backslashes - 1] == "\\":
+        backslashes += 1
+    return backslashes % 2 == 1
+
+
+def matcher_for(pattern):
+    """Return the cheapest match method for a compiled hostname pattern.
+
+    Anchored patterns don't need re.search's scan over every start position:
+    a leading ``^`` allows ``match`` and a trailing ``$``/``\\Z`` on top of
+    that allows ``fullmatch``, which prunes the backtracking search space.
+    Patterns containing an alternation always get ``search`` — a top-level
+    ``|`` scopes the leading anchor to its first branch only, and telling
+    top-level from grouped alternations isn't worth parsing for here. A
+    trailing anchor only counts when it isn't itself escaped.
+    """
+    raw = pattern.pattern
+    if not raw.startswith("^") or "|" in raw:
+        return pattern.search
+    for anchor in ("$", r"\Z"):
+        if raw.endswith(anchor) and not _is_escaped(raw, len(raw) - len(anchor)):
+            return pattern.fullmatch
+    return pattern.match
+
+
+# Compiled databases are heavyweight; a handful covers scheduled-job churn.
+@functools.lru_cache(maxsize=16)
+def _hyperscan_database(hostname_regex):
+    """Compile a Hyperscan database for the pattern, once per unique regex."""
+    database = hyperscan.Database()
+    database.compile(
+        expressions=[hostname_regex.encode()],
+        ids=[0],
+        flags=[hyperscan.HS_FLAG_SINGLEMATCH],
+    )
+    return database
+
+
+def _hyperscan_matcher(hostname_regex):
+    """Return a name -> bool matcher backed by Hyperscan, or None.
+
+    Returns None when hyperscan is not installed or the pattern uses
+    constructs its compiler rejects (e.g. backreferences), in which case the
+    caller falls back to the stdlib engine.
+    """
+    if hyperscan is None:
+        return None
+    try:
+        database = _hyperscan_database(hostname_regex)
+    except hyperscan.error:
+        return None
+
+    def matcher(device_name):
+        matched = False
+
+        def on_match(match_id, start, end, match_flags, context):
+            nonlocal matched
+            matched = True
+
+        database.scan(device_name.encode(), match_event_handler=on_match)
+        return matched
+
+    return matcher
+
+
+# Scheduled runs resubmit the same regex over and over; the worker process is
+# long-lived, so one compile per unique pattern amortizes across task runs.
+# 128 entries bounds memory while easily covering typical pattern churn.
+@functools.lru_cache(maxsize=128)
+def _compile_hostname(hostname_regex):
+    """Compile the stdlib pattern, once per unique regex per worker."""
+    return re.compile(hostname_regex)
+
+
+def hostname_matcher(hostname_regex):
+    """Return the fastest available name -> match callable for the pattern.
+
+    Hyperscan's DFA avoids the backtracking blowups a hostile pattern can
+    trigger in the stdlib NFA engine and is markedly faster on large device
+    sets, so use it when the optional dependency is present.
+    """
+    matcher = _hyperscan_matcher(hostname_regex)
+    if matcher is not None:
+        return matcher
+    return matcher_for(_compile_hostname(hostname_regex))
+
+
+def normalize(queryset):
+    """Return a readable summary of the objects selected in a form field."""
+    # Asking the database for just the identifying column avoids hydrating
+    # model instances and the per-element hasattr() fallback the old
+    # implementation paid. Location and Role are identified by name;
+    # DeviceType by model.
+    field = "model" if queryset.model is DeviceType else "name"
+    return ", ".join(queryset.values_list(field, flat=True))
+
+
+# Constructed once at import; every job shares these instances by reference
+# instead of rebinding copies in each class body. query_params scope the
+# API-backed dropdowns to choices that can actually apply to a device, so
+# large installs don't page through every location or role.
+LOCATION_VAR = MultiObjectVar(
+    model=Location,
+    query_params={"content_type": "dcim.device"},
+    required=False,
+)
+DEVICE_ROLE_VAR = MultiObjectVar(
+    model=Role,
+    query_params={"content_types": "dcim.device"},
+    required=False,
+)
+DEVICE_TYPE_VAR = MultiObjectVar(model=DeviceType, required=False)
+
+
+class DeviceFilterMixin:
+    """Device filter form fields shared by the data quality jobs."""
+
+    location = LOCATION_VAR
+    device_role = DEVICE_ROLE_VAR
+    device_type = DEVICE_TYPE_VAR
+
+
+@shared_task
+def verify_hostnames_chunk(device_pks, hostname_regex):
+    """Regex-check one chunk of device pks; return ``[(pk, ok), ...]``."""
+    matcher = hostname_matcher(hostname_regex)
+    return [
+        (str(pk), bool(matcher(device_name)))
+        for pk, device_name in Device.objects.filter(pk__in=device_pks).values_list("pk", "name")
+    ]
+
+
+class VerifyHostnames(DeviceFilterMixin, Job):
+    """Verify device hostnames match corporate standards."""
+
+    hostname_regex = StringVar(
+        description="Regular expression to check the hostname against",
+        default=".*",
+        required=True,
+    )
+    parallelize = BooleanVar(
+        description=(
+            "Fan the regex checks out to the Celery worker pool in chunks. "
+            "Needs spare worker capacity beyond this job's own slot; on a "
+            "single-worker deployment the chunks cannot be scheduled."
+        ),
+        default=False,
+        required=False,
+    )
+
+    class Meta:
+        name = "Verify Hostnames"
+        description = "Verify device hostnames match corporate standards"
+
+    def run(self, location, device_role, device_type, hostname_regex, parallelize):
+        """Execute the job."""
+        self.logger.info(
+            "Verifying hostnames for location: %s; role: %s; type: %s",
+            normalize(location),
+            normalize(device_role),
+            normalize(device_type),
+        )
+        if hostname_regex.count(".*") > 1:
+            self.logger.warning(
+                "Pattern contains multiple `.*` repetitions; this is a common "
+                "source of pathological backtracking on non-matching hostnames."
+            )
+        devices = filter_devices(location, device_role, device_type)
+        results = None
+        # Postgres only: MySQL reports bad regexp syntax as OperationalError,
+        # which can't be caught without also swallowing real connection
+        # failures, so its in-database path would hard-fail on Python-only
+        # pattern syntax.
+        if connection.vendor == "postgresql":
+            try:
+                # The savepoint keeps a rejected pattern from poisoning the
+                # surrounding transaction, so the fallback below can still
+                # query.
+                with transaction.atomic():
+                    compliant, non_compliant, results = self._verify_in_database(
+                        devices, hostname_regex
+                    )
+            except DataError:
+                self.logger.info(
+                    "Pattern is not supported by the database regex engine; "
+                    "matching in-process instead."
+                )
+        if results is None and parallelize:
+            pks = [str(pk) for pk in devices.values_list("pk", flat=True)]
+            if len(pks) >= PARALLEL_THRESHOLD:
+                try:
+                    compliant, non_compliant, results = self._verify_parallel(
+                        pks, hostname_regex
+                    )
+                except CeleryTimeoutError:
+                    self.logger.warning(
+                        "Chunk tasks did not finish within %d s (no spare "
+                        "worker capacity?); matching in-process instead.",
+                        CHUNK_JOIN_TIMEOUT,
+                    )
+        if results is None:
+            compliant, non_compliant, results = self._verify_inline(
+                devices, hostname_regex
+            )
+        flush_results(self, results)
+        self.logger.info("%d compliant, %d non-compliant.", compliant, non_compliant)
+
+    def _verify_in_database(self, devices, hostname_regex):
+        """Evaluate the regex in SQL; return (compliant, non_compliant, results).
+
+        Postgres compiles __regex to its native engine, so the match runs
+        where the data lives: one count for the compliant bucket and one
+        narrow SELECT returning only the failures, instead of pulling every
+        row into Python. The database regex dialect is POSIX; patterns using
+        Python-only syntax make the backend raise DataError, which the caller
+        catches to fall back to the in-process paths.
+        """
+        compliant = devices.filter(name__regex=hostname_regex).count()
+        results = [
+            (LogLevelChoices.LOG_WARNING, device, "Hostname is not compliant.")
+            for device in devices.exclude(name__regex=hostname_regex)
+            .only("name")
+            .iterator(chunk_size=2000)
+        ]
+        return compliant, len(results), results
+
+    def _verify_inline(self, devices, hostname_regex):
+        """Check hostnames in-process; return (compliant, non_compliant, results)."""
+        # Compile once; re.search(pattern, ...) re-enters the module-level
+        # cache lookup on every call.
+        matcher = hostname_matcher(hostname_regex)
+        results = []
+        compliant = 0
+        non_compliant = 0
+        # Bind the bound methods to locals; attribute lookups inside the loop
+        # cost a dict probe per device.
+        append = results.append
+        info = LogLevelChoices.LOG_INFO
+        warning = LogLevelChoices.LOG_WARNING
+        # Only the name is read; skip the rest of the wide Device row.
+        for device in devices.only("name").iterator(chunk_size=2000):
+            if matcher(device.name):
+                append((info, device, "Hostname is compliant."))
+                compliant += 1
+            else:
+                append((warning, device, "Hostname is not compliant."))
+                non_compliant += 1
+        return compliant, non_compliant, results
+
+    def _verify_parallel(self, pks, hostname_regex):
+        """Fan the regex work out to the worker pool in chunks of device pks.
+
+        Joining inside a running task blocks this job's worker slot, which is
+        why the fan-out is opt-in and the join is bounded: if the chunks are
+        still queued when the timeout expires (nobody free to run them), the
+        caller falls back to matching in-process.
+        """
+        chunks = [
+            pks[start : start + HOSTNAME_CHUNK_SIZE]
+            for start in range(0, len(pks), HOSTNAME_CHUNK_SIZE)
+        ]
+        tasks = group(verify_hostnames_chunk.s(chunk, hostname_regex) for chunk in chunks)
+        with allow_join_result():
+            chunk_results = tasks.apply_async().join(timeout=CHUNK_JOIN_TIMEOUT)
+        bad_pks = [pk for chunk in chunk_results for pk, ok in chunk if not ok]
+        # Only the failures get per-device log entries; rehydrating every
+        # compliant device here would undo the fan-out win.
+        results = [
+            (LogLevelChoices.LOG_WARNING, device, "Hostname is not compliant.")
+            for device in Device.objects.filter(pk__in=bad_pks).only("name")
+        ]
+        return len(pks) - len(bad_pks), len(bad_pks), results
+
+
+class VerifyPlatform(DeviceFilterMixin, Job):
+    """Verify a device has a platform defined."""
+
+    class Meta:
+        name = "Verify Platform"
+        description = "Verify a device has a platform defined"
+
+    def run(self, location, device_role, device_type):
+        """Execute the job."""
+        self.logger.info(
+            "Verifying platforms for location: %s; role: %s; type: %s",
+            normalize(location),
+            normalize(device_role),
+            normalize(device_type),
+        )
+        devices = filter_devices(location, device_role, device_type)
+        results = []
+        # Bucket in SQL; `if device.platform` would lazy-load the FK per device.
+        present = (
+            devices.filter(platform__isnull=False)
+            .select_related("platform")
+            .only("name", "platform__name")
+        )
+        for device in present.iterator(chunk_size=2000):
+            results.append((LogLevelChoices.LOG_INFO, device, f"Platform: {device.platform}"))
+        missing = 0
+        for device in devices.filter(platform__isnull=True).only("name").iterator(
+            chunk_size=2000
+        ):
+            results.append((LogLevelChoices.LOG_WARNING, device, "No platform defined."))
+            missing += 1
+        flush_results(self, results)
+        self.logger.info("%d of %d devices have no platform.", missing, len(results))
+
+
+class VerifyPrimaryIP(DeviceFilterMixin, Job):
+    """Verify a device has a primary IP defined."""
+
+    class Meta:
+        name = "Verify Primary IP"
+        description = "Verify a device has a primary IP defined"
+
+    def run(self, location, device_role, device_type):
+        """Execute the job."""
+        self.logger.info(
+            "Verifying primary IPs for location: %s; role: %s; type: %s",
+            normalize(location),
+            normalize(device_role),
+            normalize(device_type),
+        )
+        results = []
+        # Only the master of a virtual chassis is expected to carry the primary
+        # IP; resolve that in SQL so member devices are filtered out before
+        # they ever reach Python.
+        devices = filter_devices(location, device_role, device_type).annotate(
+            is_vc_master=Case(
+                When(virtual_chassis__isnull=True, then=True),
+                When(virtual_chassis__master=F("pk"), then=True),
+                default=False,
+                output_field=BooleanField(),
+            )
+        ).filter(is_vc_master=True)
+        # Bucket in SQL; device.primary_ip is a computed property that touches
+        # primary_ip4/primary_ip6 per device.
+        present = devices.exclude(
+            primary_ip4__isnull=True, primary_ip6__isnull=True
+        ).select_related("primary_ip4", "primary_ip6")
+        for device in present.iterator(chunk_size=2000):
+            results.append(
+                (LogLevelChoices.LOG_INFO, device, f"Primary IP: {device.primary_ip}")
+            )
+        missing = 0
+        for device in devices.filter(
+            primary_ip4__isnull=True, primary_ip6__isnull=True
+        ).only("name").iterator(chunk_size=2000):
+            results.append((LogLevelChoices.LOG_WARNING, device, "No primary IP defined."))
+            missing += 1
+        flush_results(self, results)
+        self.logger.info("%d of %d devices have no primary IP.", missing, len(results))
+
+
+class VerifyHasRack(DeviceFilterMixin, Job):
+    """Verify a device is assigned to a rack."""
+
+    class Meta:
+        name = "Verify Rack"
+        description = "Verify a device is assigned to a rack"
+
+    def run(self, location, device_role, device_type):
+        """Execute the job."""
+        self.logger.info(
+            "Verifying rack assignment for location: %s; role: %s; type: %s",
+            normalize(location),
+            normalize(device_role),
+            normalize(device_type),
+        )
+        devices = filter_devices(location, device_role, device_type)
+        results = []
+        # Bucket in SQL; `if device.rack` would lazy-load the FK per device.
+        present = devices.filter(rack__isnull=False).select_related("rack").only(
+            "name", "rack__name"
+        )
+        for device in present.iterator(chunk_size=2000):
+            results.append((LogLevelChoices.LOG_INFO, device, f"Rack: {device.rack}"))
+        missing = 0
+        for device in devices.filter(rack__isnull=True).only("name").iterator(chunk_size=2000):
+            results.append((LogLevelChoices.LOG_WARNING, device, "Not assigned to a rack."))
+            missing += 1
+        flush_results(self, results)
+        self.logger.info("%d of %d devices are not racked.", missing, len(results))
+
+
+def check_hostname(device, matcher):
+    """Return (ok, message) for the hostname compliance check."""
+    if matcher(device.name):
+        return True, "Hostname is compliant."
+    return False, "Hostname is not compliant."
+
+
+def check_platform(device):
+    """Return (ok, message) for the platform check."""
+    if device.platform:
+        return True, f"Platform: {device.platform}"
+    return False, "No platform defined."
+
+
+def check_rack(device):
+    """Return (ok, message) for the rack assignment check."""
+    if device.rack:
+        return True, f"Rack: {device.rack}"
+    return False, "Not assigned to a rack."
+
+
+def check_primary_ip(device):
+    """Return (ok, message) for the primary IP check."""
+    # The *_id attributes are on the row itself; no join or lazy fetch needed
+    # to decide existence.
+    if device.primary_ip4_id or device.primary_ip6_id:
+        return True, f"Primary IP: {device.primary_ip}"
+    return False, "No primary IP defined."
+
+
+class VerifyAll(DeviceFilterMixin, Job):
+    """Run every per-device data quality check with a single device scan."""
+
+    hostname_regex = StringVar(
+        description="Regular expression to check the hostname against",
+        default=".*",
+        required=True,
+    )
+
+    class Meta:
+        name = "Verify All"
+        description = "Run all device data quality checks in one pass"
+
+    def run(self, location, device_role, device_type, hostname_regex):
+        """Execute the job."""
+        self.logger.info(
+            "Verifying devices for location: %s; role: %s; type: %s",
+            normalize(location),
+            normalize(device_role),
+            normalize(device_type),
+        )
+        matcher = hostname_matcher(hostname_regex)
+        # One scan of the device table with every FK the checks read joined
+        # up front; running the five individual jobs would scan it five times.
+        # The checks are cheap pure functions, so dispatching them to worker
+        # tasks would cost more in serialization than it saves.
+        devices = filter_devices(
+            location,
+            device_role,
+            device_type,
+            select=("platform", "rack", "virtual_chassis", "primary_ip4", "primary_ip6"),
+        )
+        results = []
+        failures = 0
+        for device in devices.iterator(chunk_size=2000):
+            checks = [
+                check_hostname(device, matcher),
+                check_platform(device),
+                check_rack(device),
+            ]
+            # Only the master of a virtual chassis is expected to carry the
+            # primary IP.
+            if device.virtual_chassis_id is None or device.virtual_chassis.master_id == device.pk:
+                checks.append(check_primary_ip(device))
+            for ok, message in checks:
+                if ok:
+                    results.append((LogLevelChoices.LOG_INFO, device, message))
+                else:
+                    results.append((LogLevelChoices.LOG_WARNING, device, message))
+                    failures += 1
+        flush_results(self, results)
+        self.logger.info("%d findings across %d checks.", failures, len(results))
+
+
+class VerifyCircuitTermination(Job):
+    """Verify circuits terminate on a device interface with an IP address."""
+
+    class Meta:
+        name = "Verify Circuit Termination"
+        description = "Verify circuits terminate on a device interface with an IP address"
+
+    def run(self):
+        """Execute the job."""
+        # Pre-join the termination path and bulk-load the destination IPs so the
+        # loop below reads everything from cache instead of issuing four-plus
+        # queries per circuit.
+        #
+        # The split between select_related and prefetch_related here is
+        # deliberate, not an oversight: the path is a to-one relation, so
+        # joining it adds columns but no rows, while the destination IPs are
+        # a to-many relation — folding them into the join would return one
+        # row per IP per circuit (a Cartesian blowup on multi-IP interfaces).
+        # The extra prefetch query is cheaper than that wider result set, so
+        # don't "optimize" the Prefetch away into select_related.
+        circuits = Circuit.objects.select_related("circuit_termination_a___path").prefetch_related(
+            # The destination comes out of the generic-FK prefetch as a bare
+            # interface row, so its device FK must be prefetched too or the
+            # message rendering below issues one lazy query per circuit.
+            "circuit_termination_a___path__destination__device",
+            Prefetch(
+                "circuit_termination_a___path__destination__ip_addresses",
+                # address is a property assembled from these two columns.
+                queryset=IPAddress.objects.only("host", "mask_length"),
+            ),
+        )
+        results = []
+        # chunk_size is required for prefetch_related to apply per chunk.
+        for circuit in circuits.iterator(chunk_size=1000):
+            termination = circuit.circuit_termination_a
+            if termination is None:
+                results.append((LogLevelChoices.LOG_WARNING, circuit, "No A-side termination."))
+                continue
+            interface = termination.path.destination if termination.path else None
+            if interface is None:
+                results.append(
+                    (LogLevelChoices.LOG_WARNING, circuit, "A-side termination is not connected.")
+                )
+                continue
+            # next(iter(...)) reads the prefetch cache; .first() would issue a
+            # fresh `ORDER BY ... LIMIT 1` query per circuit.
+            ip_address = next(iter(interface.ip_addresses.all()), None)
+            if ip_address is None:
+                results.append(
+                    (
+                        LogLevelChoices.LOG_WARNING,
+                        circuit,
+                        f"{interface} on {interface.device} has no IP address.",
+                    )
+                )
+            else:
+                results.append(
+                    (
+                        LogLevelChoices.LOG_INFO,
+                        circuit,
+                        f"Terminates on {interface.device} ({ip_address}).",
+                    )
+                )
+        flush_results(self, results)
+        self.logger.info("Checked %d circuits.", len(results))
+
+
+register_jobs(
+    VerifyAll,
+    VerifyCircuitTermination,
+    VerifyHasRack,
+    VerifyHostnames,
+    VerifyPlatform,
+    VerifyPrimaryIP,
+)